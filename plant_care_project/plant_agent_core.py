@@ -1,36 +1,94 @@
+import atexit
+import gzip
+import heapq
+import importlib.util
 import json
-import openai
 import os
-from dataclasses import dataclass, asdict
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 load_dotenv()
 
+try:
+    import orjson  # optional: much faster (de)serialization for the gardening log
+except ImportError:
+    orjson = None
 
-LOG_FILE = "garden_log.json"
 
+LOG_FILE = "garden_log.jsonl"
+LEGACY_LOG_FILE = "garden_log.json"  # pre-JSONL log, migrated on first load
+COMPACT_THRESHOLD = 0.2  # share of unreadable lines that triggers a rewrite
+FLUSH_DELAY_SECONDS = 0.5  # new entries are written to disk in batches after this delay
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MiB buffer for full rewrites of the log
+MAX_NEXT_DUE_LEN = 32  # longest next_due the CLI's log index can hold
+
+BATCH_QUEUE_FILE = "batch_queue.jsonl"  # pending OpenAI Batch API requests
+SUGGESTIONS_FILE = "suggestions.jsonl"  # answers from completed batches
+SUGGESTIONS_READ_BYTES = 1 << 16  # block size when reading suggestions back from the end
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_POLL_SECONDS = 60
+
+
+LLM_MODEL = "gpt-4.1-mini"  # or gpt-4.1, gpt-4o-mini, etc.
 
-_openai_client = None
 
 _openai_client = None
+_openai_client_lock = threading.Lock()
+
+def _get_api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not set.")
+    return api_key
+
 
 def get_openai_client():
     global _openai_client
     if _openai_client is not None:
         return _openai_client
 
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not set.")
-
-    _openai_client = openai.OpenAI(api_key=api_key)
+    with _openai_client_lock:
+        if _openai_client is None:
+            api_key = _get_api_key()
+            # Imported on first use: openai is slow to import and many code paths never need it.
+            import httpx  # installed with openai
+            import openai
+
+            # One long-lived pool so TLS sessions are reused across calls and threads;
+            # HTTP/2 multiplexing is used when the optional `h2` package is installed.
+            http_client = httpx.Client(
+                http2=importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+            atexit.register(http_client.close)
+            _openai_client = openai.OpenAI(api_key=api_key, http_client=http_client)
     return _openai_client
 
 
+# ---------- JSON Helpers ----------
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
 # ---------- Data Models ----------
 
-@dataclass
+@dataclass(slots=True)  # no per-instance __dict__: smaller entries and faster attribute access
 class LogEntry:
     timestamp: str
     plant_name: str
@@ -39,26 +97,236 @@ class LogEntry:
     next_due: Optional[str] = None  # ISO datetime string or None
 
 
+def _entry_from_record(record) -> Optional[LogEntry]:
+    """
+    LogEntry for one decoded log record, or None if it is malformed. Uses the same rules
+    as the CLI (plant_care_agent.py), since both front ends read the same file.
+    """
+    if not isinstance(record, dict):
+        return None
+    if not all(isinstance(record.get(k), str) for k in ("timestamp", "plant_name", "action")):
+        return None
+    notes = record.get("notes")
+    next_due = record.get("next_due")
+    if not isinstance(notes, (str, type(None))):
+        return None
+    # The CLI keeps next_due in a fixed-width ASCII index field.
+    if next_due is not None and not (
+        isinstance(next_due, str) and next_due.isascii() and len(next_due) <= MAX_NEXT_DUE_LEN
+    ):
+        return None
+    return LogEntry(
+        timestamp=record["timestamp"],
+        plant_name=record["plant_name"],
+        action=record["action"],
+        notes=notes or "",
+        next_due=next_due,
+    )
+
+
+def _encode_entry(entry: LogEntry) -> bytes:
+    """One JSON Lines record. Avoids dataclasses.asdict, which deep-copies every field."""
+    if orjson is not None:
+        return orjson.dumps(entry) + b"\n"  # orjson serializes dataclasses natively
+    return _json_dumps({
+        "timestamp": entry.timestamp,
+        "plant_name": entry.plant_name,
+        "action": entry.action,
+        "notes": entry.notes,
+        "next_due": entry.next_due,
+    }) + b"\n"
+
+
+def _rotated_segments(filepath: str) -> List[str]:
+    """Gzip segments (<log>.N.gz) rotated out by the CLI, oldest first."""
+    directory = os.path.dirname(filepath) or "."
+    prefix = os.path.basename(filepath) + "."
+    numbers = set()
+    for name in os.listdir(directory):
+        suffix = name[len(prefix):] if name.startswith(prefix) else ""
+        if suffix.endswith(".gz"):
+            suffix = suffix[:-3]
+        if suffix.isdigit():
+            numbers.add(int(suffix))
+    segments = []
+    for n in sorted(numbers):
+        path = f"{filepath}.{n}"
+        # A plain <log>.N is only left behind by an interrupted rotation.
+        segments.append(path + ".gz" if os.path.exists(path + ".gz") else path)
+    return segments
+
+
 class GardeningLog:
+    """
+    Append-only gardening log stored as JSON Lines (one entry per line).
+    """
+
     def __init__(self, filepath: str = LOG_FILE):
         self.filepath = filepath
         self.entries: List[LogEntry] = []
+        # Streamlit serves sessions from several threads and may share one log instance.
+        self._lock = threading.RLock()
+        # New entries are written in batches shortly after they are added (see flush()).
+        self._pending: List[LogEntry] = []
+        self._flush_timer: Optional[threading.Timer] = None
         self._load()
+        atexit.register(self.flush)
 
     def _load(self):
+        self.entries = []
+        # Identity and loaded length of the live file, so _refresh() can tell when another
+        # process (e.g. the CLI) has appended to, rotated or rewritten it.
+        self._live_ino: Optional[int] = None
+        self._live_size = 0
+        # Rotated segments are read-only; compact() only ever rewrites the live file.
+        for path in _rotated_segments(self.filepath):
+            self._read_segment(path)
+        self._archived = len(self.entries)
         if os.path.exists(self.filepath):
+            self._load_lines()
+        elif os.path.exists(LEGACY_LOG_FILE) and self.filepath == LOG_FILE and not self._archived:
+            self._load_legacy()
+
+        # Entries are appended with datetime.now(), so after this one-time sort the list
+        # stays chronological and "recent" is just the tail.
+        self.entries.sort(key=lambda e: e.timestamp)
+        # Min-heap of (next_due, index). ISO-8601 strings sort chronologically, so no parsing.
+        self._upcoming_heap: List[Tuple[str, int]] = [
+            (e.next_due, i) for i, e in enumerate(self.entries) if e.next_due
+        ]
+        heapq.heapify(self._upcoming_heap)
+
+    def _read_segment(self, path: str):
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            entry = _entry_from_record(_json_loads(line))
+                        except Exception:
+                            continue
+                        if entry is not None:
+                            self.entries.append(entry)
+        except Exception as e:
+            print(f"[GardeningLog] Could not read {path}: {e}")
+
+    def _load_lines(self):
+        bad_lines = 0
+        with open(self.filepath, "rb") as f:
+            self._live_ino = os.fstat(f.fileno()).st_ino
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written by another process; read by a later _refresh()
+                self._live_size += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = _entry_from_record(_json_loads(line))
+                except Exception:
+                    entry = None
+                if entry is None:
+                    bad_lines += 1
+                else:
+                    self.entries.append(entry)
+
+        # Drop unreadable lines once they make up a noticeable share of the file.
+        live = len(self.entries) - self._archived
+        if bad_lines and bad_lines > COMPACT_THRESHOLD * (bad_lines + live):
+            self.compact()
+
+    def _load_legacy(self):
+        # One-time migration from the old single-JSON-array log file.
+        try:
+            with open(LEGACY_LOG_FILE, "rb") as f:
+                records = _json_loads(f.read())
+            self.entries = [e for e in map(_entry_from_record, records) if e is not None]
+        except Exception:
+            self.entries = []
+        if self.entries:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log file from the in-memory entries."""
+        # Write a sibling file and swap it in, so a crash mid-write never leaves a torn log.
+        tmp_path = self.filepath + ".tmp"
+        with self._lock:
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+                f.write(b"".join(_encode_entry(e) for e in self.entries[self._archived:]))
+                self._live_ino, self._live_size = os.fstat(f.fileno()).st_ino, f.tell()
+            os.replace(tmp_path, self.filepath)
+            self._pending.clear()
+
+    def _refresh(self):
+        """
+        Catch up with writes from other processes (e.g. the CLI): load lines appended to the
+        live file, or reload everything after it was rotated, rewritten or deleted.
+        One os.stat when nothing changed.
+        """
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            if self._live_ino is not None:
+                self._reload()
+            return
+        if st.st_ino != self._live_ino or st.st_size < self._live_size:
+            self._reload()
+        elif st.st_size > self._live_size:
+            self._read_appended()
+
+    def _reload(self):
+        # Entries not yet flushed are not in the file; carry them over.
+        pending, self._pending = self._pending, []
+        self._load()
+        for entry in pending:
+            self._append_in_memory(entry)
+        self._pending = pending
+
+    def _read_appended(self, end: Optional[int] = None):
+        """Load the complete lines between the loaded length of the live file and `end` (or EOF)."""
+        with open(self.filepath, "rb") as f:
+            f.seek(self._live_size)
+            data = f.read() if end is None else f.read(end - self._live_size)
+        # The last piece is empty or a line still being written; it is read next time.
+        for line in data.split(b"\n")[:-1]:
+            self._live_size += len(line) + 1
+            if not line.strip():
+                continue
             try:
-                with open(self.filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.entries = [LogEntry(**e) for e in data]
+                entry = _entry_from_record(_json_loads(line))
             except Exception:
-                self.entries = []
-        else:
-            self.entries = []
+                continue
+            if entry is not None:
+                self._append_in_memory(entry)
 
-    def _save(self):
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([asdict(e) for e in self.entries], f, indent=2)
+    def _append_in_memory(self, entry: LogEntry):
+        self.entries.append(entry)
+        if entry.next_due:
+            heapq.heappush(self._upcoming_heap, (entry.next_due, len(self.entries) - 1))
+
+    def flush(self):
+        """Append entries added since the last flush to the log file."""
+        with self._lock:
+            self._flush_timer = None
+            if not self._pending:
+                return
+            with open(self.filepath, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                ino = os.fstat(f.fileno()).st_ino
+                f.write(b"".join(_encode_entry(e) for e in self._pending))
+                end = f.tell()
+            if self._live_ino is None and offset == 0:
+                self._live_ino = ino  # this write created the file
+            elif ino != self._live_ino or offset < self._live_size:
+                # Rotated or rewritten by another process: reload, these entries included.
+                self._pending.clear()
+                self._reload()
+                return
+            elif offset > self._live_size:
+                # Lines another process appended since we last looked.
+                self._read_appended(offset)
+            self._live_size = end
+            self._pending.clear()
 
     def add_entry(self, plant_name: str, action: str, notes: str, next_due: Optional[datetime] = None):
         entry = LogEntry(
@@ -68,26 +336,29 @@ class GardeningLog:
             notes=notes,
             next_due=next_due.isoformat(timespec="seconds") if next_due else None,
         )
-        self.entries.append(entry)
-        self._save()
+        with self._lock:
+            self._append_in_memory(entry)
+            # Debounce: a burst of entries within FLUSH_DELAY_SECONDS becomes one write.
+            self._pending.append(entry)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_DELAY_SECONDS, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
 
     def get_recent_entries(self, limit: int = 10) -> List[LogEntry]:
-        return sorted(self.entries, key=lambda e: e.timestamp, reverse=True)[:limit]
+        with self._lock:
+            self._refresh()
+            return self.entries[-limit:][::-1] if limit > 0 else []
 
     def get_upcoming_tasks(self) -> List[LogEntry]:
-        now = datetime.now()
-        upcoming = []
-        for e in self.entries:
-            if not e.next_due:
-                continue
-            try:
-                due = datetime.fromisoformat(e.next_due)
-                if due >= now:
-                    upcoming.append(e)
-            except Exception:
-                continue
-        upcoming.sort(key=lambda e: e.next_due)
-        return upcoming
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._refresh()
+            heap = self._upcoming_heap
+            # Tasks only ever move into the past, so expired ones can be dropped for good.
+            while heap and heap[0][0] < now:
+                heapq.heappop(heap)
+            return [self.entries[i] for _, i in sorted(heap)]
 
 
 # ---------- Simple Plant Knowledge Base ----------
@@ -120,12 +391,68 @@ PLANT_DATABASE: Dict[str, Dict] = {
 }
 
 
+# Normalized name -> PLANT_DATABASE key, including a few common alternative spellings.
+_PLANT_ALIASES: Dict[str, str] = {key: key for key in PLANT_DATABASE}
+_PLANT_ALIASES.update({
+    "snakeplant": "snake plant",
+    "snake-plant": "snake plant",
+    "sansevieria": "snake plant",
+    "devil's ivy": "pothos",
+    "tomatoes": "tomato",
+    "sweet basil": "basil",
+})
+
+# The "Basic profile" section of the care plan, rendered once per plant at import.
+_PROFILE_BLOCKS: Dict[str, str] = {
+    key: "\n".join([
+        "\nBasic profile (from built-in database):",
+        f"- Watering: {base['water']}",
+        f"- Light: {base['light']}",
+        f"- Soil: {base['soil']}",
+        f"- Fertilizer: {base['fertilizer']}",
+    ])
+    for key, base in PLANT_DATABASE.items()
+}
+
+_GENERAL_GUIDELINES_BLOCK = "\n".join([
+    "\nI don't have this plant in the small built-in database, so here are general indoor plant guidelines:",
+    "- Water when the top 2–3 cm (1 inch) of soil feels dry, unless it is a cactus/succulent.",
+    "- Provide bright, indirect light if possible.",
+    "- Use well-draining potting mix and ensure the pot has drainage holes.",
+    "- Fertilize lightly during the active growing season (spring/summer).",
+])
+
+
+@lru_cache(maxsize=512)
 def normalize_plant_name(name: str) -> str:
-    return name.strip().lower()
+    return name.strip().casefold()
+
+
+def lookup_plant_key(name: str) -> Optional[str]:
+    """Return the PLANT_DATABASE key for a user-typed plant name, or None."""
+    return _PLANT_ALIASES.get(normalize_plant_name(name))
 
 
 # ---------- LLM Integration Stub ----------
 
+def _chat_request(prompt: str) -> Dict:
+    return {
+        "model": LLM_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": (
+                    "You are a helpful gardening assistant. "
+                    "Explain things clearly, step by step, for beginner gardeners."
+                ),
+            },
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.4,
+        "max_tokens": 600,
+    }
+
+
 def call_llm(prompt: str) -> str | None:
     """
     Call OpenAI Chat Completions API using your personal API key.
@@ -133,125 +460,178 @@ def call_llm(prompt: str) -> str | None:
     client = get_openai_client()
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",  # or gpt-4.1, gpt-4o-mini, etc.
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a helpful gardening assistant. "
-                        "Explain things clearly, step by step, for beginner gardeners."
-                    ),
-                },
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.4,
-            max_tokens=600,
-        )
+        response = client.chat.completions.create(**_chat_request(prompt))
         return response.choices[0].message.content.strip()
     except Exception as e:
         print(f"[call_llm] OpenAI error: {e}")
         return None
 
 
+def call_llm_stream(prompt: str) -> Iterator[str]:
+    """
+    Streaming variant of `call_llm`: yields the reply piece by piece as it is generated.
+    Errors are raised, even part-way through, so callers never mistake a cut-off reply
+    for a complete one.
+    """
+    client = get_openai_client()
+    request = _chat_request(prompt)
+    request["stream"] = True
+
+    for chunk in client.chat.completions.create(**request):
+        if chunk.choices:
+            yield chunk.choices[0].delta.content or ""
+
 
-def maybe_refine_with_llm(prompt: str, fallback: str, use_llm: bool) -> str:
-    if not use_llm:
-        return fallback
+def call_llm_json(prompt: str) -> Dict | None:
+    """
+    Like `call_llm`, but asks for a JSON object reply and returns it parsed.
+    """
+    client = get_openai_client()
+    request = _chat_request(prompt)
+    request["response_format"] = {"type": "json_object"}
+    request["max_tokens"] = 1200  # room for several fields without truncating the JSON
+
+    try:
+        response = client.chat.completions.create(**request)
+        data = _json_loads(response.choices[0].message.content)
+    except Exception as e:
+        print(f"[call_llm_json] OpenAI error: {e}")
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class LLMStreamInterrupted(Exception):
+    """A streamed reply broke off after part of it was shown; `fallback` is the full text to show instead."""
+
+    def __init__(self, message: str, fallback: str):
+        super().__init__(message)
+        self.fallback = fallback
+
+
+def stream_refine_with_llm(prompt: str, fallback: str) -> Iterator[str]:
+    """
+    Yields the LLM rewrite of `prompt`, or `fallback` if the request fails before any text.
+    Raises LLMStreamInterrupted if it fails after some text was already yielded.
+    """
+    streamed = False
     try:
-        resp = call_llm(prompt)
-    except NotImplementedError:
-        resp = None
-    return resp or fallback
+        for piece in call_llm_stream(prompt):
+            if piece:
+                streamed = True
+                yield piece
+    except Exception as e:
+        print(f"[stream_refine_with_llm] OpenAI error: {e}")
+        if streamed:
+            raise LLMStreamInterrupted(str(e), fallback) from e
+    if not streamed:
+        yield fallback
 
 
 # ---------- Disease / Issue Diagnosis ----------
 
-def diagnose_disease(symptoms: str, use_llm: bool = False) -> Dict[str, str]:
-    text = symptoms.lower()
-    possible = []
+# Every keyword the rules look at, found in one case-insensitive pass. Matching is by
+# substring (so "insects" hits "insect"); the lookahead lets overlapping keywords all report.
+_SYMPTOM_KEYWORDS = (
+    "yellow", "leaf", "brown", "tip", "spots", "black", "white", "powder",
+    "soft", "mushy", "rot", "bugs", "insect", "aphid", "mealy", "mites", "scale",
+)
+_SYMPTOM_RE = re.compile("(?=(" + "|".join(_SYMPTOM_KEYWORDS) + "))", re.IGNORECASE)
+
+# Possible causes as (cause, advice line for the rule-based advice text).
+_NUTRIENT = ("Nutrient deficiency or overwatering",
+             "- Nutrient deficiency or overwatering: Check drainage, avoid waterlogging, and consider a balanced fertilizer. "
+             "Ensure pot has drainage holes.")
+_LOW_HUMIDITY = ("Low humidity or underwatering",
+                 "- Low humidity or underwatering: Increase humidity (tray of water, humidifier) and check that you are "
+                 "watering evenly.")
+_LEAF_SPOT = ("Fungal or bacterial leaf spot",
+              "- Fungal or bacterial leaf spot: Remove heavily affected leaves, improve air circulation, avoid overhead "
+              "watering. Consider a fungicide if severe.")
+_POWDERY_MILDEW = ("Powdery mildew",
+                   "- Powdery mildew: Remove affected leaves, increase airflow, avoid wetting foliage. Use a safe fungicidal "
+                   "spray if needed.")
+_ROT = ("Root or stem rot (usually overwatering)",
+        "- Root or stem rot (usually overwatering): Reduce watering, improve drainage, trim rotten roots/stems if possible, "
+        "and repot into fresh dry soil.")
+_PESTS = ("Pest infestation",
+          "- Pest infestation: Isolate the plant, wash leaves with water, and treat with insecticidal soap or neem oil. "
+          "Repeat weekly until resolved.")
+
+# Keyword set -> cause. A cause matches when all keywords of one of its sets are present;
+# entries are listed in the order causes should be reported.
+_RULE_TABLE: Dict[frozenset, Tuple[str, str]] = {
+    frozenset({"yellow", "leaf"}): _NUTRIENT,
+    frozenset({"brown", "tip"}): _LOW_HUMIDITY,
+    frozenset({"spots", "black"}): _LEAF_SPOT,
+    frozenset({"spots", "brown"}): _LEAF_SPOT,
+    frozenset({"white", "powder"}): _POWDERY_MILDEW,
+    **{frozenset({k}): _ROT for k in ("soft", "mushy", "rot")},
+    **{frozenset({k}): _PESTS for k in ("bugs", "insect", "aphid", "mealy", "mites", "scale")},
+}
 
-    if "yellow" in text and "leaf" in text:
-        possible.append(
-            ("Nutrient deficiency or overwatering",
-             "Check drainage, avoid waterlogging, and consider a balanced fertilizer. Ensure pot has drainage holes.")
-        )
-    if "brown" in text and "tip" in text:
-        possible.append(
-            ("Low humidity or underwatering",
-             "Increase humidity (tray of water, humidifier) and check that you are watering evenly.")
-        )
-    if "spots" in text and ("black" in text or "brown" in text):
-        possible.append(
-            ("Fungal or bacterial leaf spot",
-             "Remove heavily affected leaves, improve air circulation, avoid overhead watering. Consider a fungicide if severe.")
-        )
-    if "white" in text and ("powder" in text or "powdery" in text):
-        possible.append(
-            ("Powdery mildew",
-             "Remove affected leaves, increase airflow, avoid wetting foliage. Use a safe fungicidal spray if needed.")
-        )
-    if "soft" in text or "mushy" in text or "rot" in text:
-        possible.append(
-            ("Root or stem rot (usually overwatering)",
-             "Reduce watering, improve drainage, trim rotten roots/stems if possible, and repot into fresh dry soil.")
-        )
-    if any(k in text for k in ["bugs", "insect", "aphid", "mealy", "mites", "scale"]):
-        possible.append(
-            ("Pest infestation",
-             "Isolate the plant, wash leaves with water, and treat with insecticidal soap or neem oil. Repeat weekly until resolved.")
-        )
+_NO_MATCH_SUMMARY = "No clear match from the symptom rules."
+_NO_MATCH_ADVICE = ("Check for pests under leaves, inspect roots for rot, and review watering and light conditions. "
+                    "If possible, compare visuals to trusted plant diagnosis resources or consult a local gardening expert.")
+
+
+@lru_cache(maxsize=256)
+def _rule_based_diagnosis(symptoms: str) -> Tuple[str, str]:
+    hits = {m.group(1).lower() for m in _SYMPTOM_RE.finditer(symptoms)}
+    if not hits:
+        return _NO_MATCH_SUMMARY, _NO_MATCH_ADVICE
+
+    possible = []
+    for keywords, cause in _RULE_TABLE.items():
+        if keywords <= hits and cause not in possible:
+            possible.append(cause)
 
     if not possible:
-        base_summary = "No clear match from the symptom rules."
-        base_advice = ("Check for pests under leaves, inspect roots for rot, and review watering and light conditions. "
-                       "If possible, compare visuals to trusted plant diagnosis resources or consult a local gardening expert.")
-    else:
-        base_summary = "; ".join([p[0] for p in possible])
-        base_advice = "\n\n".join([f"- {p[0]}: {p[1]}" for p in possible])
-
-    summary_prompt = (
+        return _NO_MATCH_SUMMARY, _NO_MATCH_ADVICE
+    return "; ".join([p[0] for p in possible]), "\n\n".join([p[1] for p in possible])
+
+
+def diagnose_disease(symptoms: str, use_llm: bool = False) -> Dict[str, str]:
+    base_summary, base_advice = _rule_based_diagnosis(symptoms)
+
+    if not use_llm:
+        return {"summary": base_summary, "advice": base_advice}
+
+    # One request for both rewrites: half the round trips and a shared system prompt.
+    prompt = (
         f"User symptoms: {symptoms}\n\nRule-based summary: {base_summary}\n\n"
-        "Rewrite the summary in clear, friendly language for a home gardener."
+        f"Rule-based advice:\n{base_advice}\n\n"
+        "Rewrite the summary in clear, friendly language for a home gardener, and rewrite the advice "
+        "as clear, step-by-step instructions for a beginner gardener. "
+        'Reply with a JSON object with two string fields: "summary" and "advice".'
     )
-    advice_prompt = (
-        f"User symptoms: {symptoms}\n\nRule-based advice:\n{base_advice}\n\n"
-        "Rewrite this advice as clear, step-by-step instructions for a beginner gardener."
-    )
-
-    refined_summary = maybe_refine_with_llm(summary_prompt, base_summary, use_llm)
-    refined_advice = maybe_refine_with_llm(advice_prompt, base_advice, use_llm)
+    refined = call_llm_json(prompt) or {}
+    refined_summary = refined.get("summary")
+    refined_advice = refined.get("advice")
 
     return {
-        "summary": refined_summary,
-        "advice": refined_advice,
+        "summary": refined_summary if isinstance(refined_summary, str) and refined_summary else base_summary,
+        "advice": refined_advice if isinstance(refined_advice, str) and refined_advice else base_advice,
     }
 
 
 # ---------- Plant Care Advisor ----------
 
-def generate_care_plan(plant_name: str,
-                       light: str,
-                       watering_habit: str,
-                       issues: Optional[str] = None,
-                       use_llm: bool = False) -> str:
-    key = normalize_plant_name(plant_name)
-    base = PLANT_DATABASE.get(key)
-
-    lines = [f"Plant care plan for **{plant_name}**"]
-
-    if base:
-        lines.append("\nBasic profile (from built-in database):")
-        lines.append(f"- Watering: {base['water']}")
-        lines.append(f"- Light: {base['light']}")
-        lines.append(f"- Soil: {base['soil']}")
-        lines.append(f"- Fertilizer: {base['fertilizer']}")
-    else:
-        lines.append("\nI don't have this plant in the small built-in database, so here are general indoor plant guidelines:")
-        lines.append("- Water when the top 2–3 cm (1 inch) of soil feels dry, unless it is a cactus/succulent.")
-        lines.append("- Provide bright, indirect light if possible.")
-        lines.append("- Use well-draining potting mix and ensure the pot has drainage holes.")
-        lines.append("- Fertilize lightly during the active growing season (spring/summer).")
+def _diagnosis_block(summary: str, advice: str) -> str:
+    return f"\nPreliminary issue diagnosis:\nPossible causes: {summary}\nSuggested actions:\n{advice}"
+
+
+@lru_cache(maxsize=256)
+def _build_care_text(plant_name: str,
+                     light: str,
+                     watering_habit: str,
+                     issues: Optional[str] = None,
+                     diagnosis: Optional[Tuple[str, str]] = None) -> str:
+    key = lookup_plant_key(plant_name)
+
+    lines = [
+        f"Plant care plan for **{plant_name}**",
+        _PROFILE_BLOCKS[key] if key else _GENERAL_GUIDELINES_BLOCK,
+    ]
 
     lines.append("\nYour described conditions:")
     lines.append(f"- Light: {light}")
@@ -259,53 +639,83 @@ def generate_care_plan(plant_name: str,
 
     if issues:
         lines.append(f"- Reported issues: {issues}")
-        diag = diagnose_disease(issues, use_llm=use_llm)
-        lines.append("\nPreliminary issue diagnosis:")
-        lines.append(f"Possible causes: {diag['summary']}")
-        lines.append("Suggested actions:")
-        lines.append(diag["advice"])
+        if diagnosis:
+            lines.append(_diagnosis_block(*diagnosis))
 
     lines.append("\nGeneral best practices:")
     lines.append("- Check soil moisture with your finger before watering.")
     lines.append("- Rotate the plant every 1–2 weeks for even growth.")
     lines.append("- Remove dead or yellowing leaves to reduce stress and disease risk.")
 
-    care_text = "\n".join(lines)
+    return "\n".join(lines)
 
+
+def generate_care_plan(plant_name: str,
+                       light: str,
+                       watering_habit: str,
+                       issues: Optional[str] = None,
+                       use_llm: bool = False) -> str:
     if not use_llm:
-        return care_text
+        diagnosis = _rule_based_diagnosis(issues) if issues else None
+        # Streamlit reruns the whole script on every interaction, so identical inputs are common.
+        return _build_care_text(plant_name, light, watering_habit, issues, diagnosis)
+
+    # Nothing to show progressively here, so a single request: any failure falls back whole.
+    prompt, care_text = _llm_care_prompt(plant_name, light, watering_habit, issues)
+    return call_llm(prompt) or care_text
 
+
+def _llm_care_prompt(plant_name: str,
+                     light: str,
+                     watering_habit: str,
+                     issues: Optional[str]) -> Tuple[str, str]:
+    """(rewrite prompt, fallback text) for the LLM care plan; both include the refined diagnosis."""
+    diagnosis = None
+    if issues:
+        diag = diagnose_disease(issues, use_llm=True)
+        diagnosis = (diag["summary"], diag["advice"])
+    care_text = _build_care_text(plant_name, light, watering_habit, issues, diagnosis)
     prompt = (
         "Rewrite the following plant care plan so it is very clear, friendly, and easy to follow for a beginner gardener. "
         "Keep all important details, but feel free to organize it with headings and bullet points.\n\n"
         f"{care_text}"
     )
-    return maybe_refine_with_llm(prompt, care_text, use_llm)
+    return prompt, care_text
+
+
+def stream_care_plan(plant_name: str,
+                     light: str,
+                     watering_habit: str,
+                     issues: Optional[str] = None) -> Iterator[str]:
+    """
+    LLM-refined care plan, yielded as it is generated (e.g. for `st.write_stream`).
+    """
+    prompt, care_text = _llm_care_prompt(plant_name, light, watering_habit, issues)
+    yield from stream_refine_with_llm(prompt, care_text)
 
 
 # ---------- Next-Due Suggestion ----------
 
-def suggest_next_due(action: str) -> Optional[datetime]:
+@lru_cache(maxsize=512)
+def _next_due_delta(action: str) -> Optional[timedelta]:
     action_l = action.lower()
     if "water" in action_l:
-        return datetime.now() + timedelta(days=3)
+        return timedelta(days=3)
     if "fertiliz" in action_l:
-        return datetime.now() + timedelta(weeks=4)
+        return timedelta(weeks=4)
     if "prune" in action_l or "trim" in action_l:
-        return datetime.now() + timedelta(weeks=8)
+        return timedelta(weeks=8)
     if "repot" in action_l:
-        return datetime.now() + timedelta(days=180)
+        return timedelta(days=180)
     return None
 
 
-def generate_upcoming_task_from_logs(log: 'GardeningLog', use_llm: bool = False) -> Optional[str]:
-    """
-    Analyze recent log entries and generate an intelligent upcoming task reminder.
-    Returns a formatted string with the suggested task, or None if no suggestion.
-    """
-    if not use_llm:
-        return None
+def suggest_next_due(action: str) -> Optional[datetime]:
+    delta = _next_due_delta(action)
+    return datetime.now() + delta if delta else None
 
+
+def _upcoming_task_prompt(log: 'GardeningLog') -> Optional[str]:
     recent = log.get_recent_entries(limit=10)
     if not recent:
         return None
@@ -321,7 +731,7 @@ def generate_upcoming_task_from_logs(log: 'GardeningLog', use_llm: bool = False)
 
     log_text = "\n".join(log_summary)
 
-    prompt = f"""Based on the following recent gardening log entries, suggest ONE upcoming task or reminder that would be helpful for the gardener.
+    return f"""Based on the following recent gardening log entries, suggest ONE upcoming task or reminder that would be helpful for the gardener.
 
 Recent log entries:
 {log_text}
@@ -334,9 +744,157 @@ Consider:
 Provide a concise, actionable task in 1-2 sentences. Format: "Task: [action needed] - [brief explanation]"
 """
 
+
+def generate_upcoming_task_from_logs(log: 'GardeningLog', use_llm: bool = False) -> Optional[str]:
+    """
+    Analyze recent log entries and generate an intelligent upcoming task reminder.
+    Returns a formatted string with the suggested task, or None if no suggestion.
+    """
+    if not use_llm:
+        return None
+
+    prompt = _upcoming_task_prompt(log)
+    if prompt is None:
+        return None
+
     try:
         result = call_llm(prompt)
         return result
     except Exception as e:
         print(f"[generate_upcoming_task_from_logs] Error: {e}")
         return None
+
+
+# ---------- Background Task Suggestions (OpenAI Batch API) ----------
+#
+# Upcoming-task suggestions are not latency critical, so instead of blocking the UI they
+# are queued as Batch API requests (half the price of synchronous calls). A daemon thread
+# uploads the queue, polls the batch and appends the answers to SUGGESTIONS_FILE.
+
+_batch_lock = threading.Lock()
+_batch_worker: Optional[threading.Thread] = None
+
+
+def queue_upcoming_task_suggestion(log: 'GardeningLog') -> bool:
+    """
+    Queue an upcoming-task suggestion for the Batch API and make sure the worker runs.
+    Returns False if there is nothing to base a suggestion on.
+    """
+    prompt = _upcoming_task_prompt(log)
+    if prompt is None:
+        return False
+
+    request = {
+        "custom_id": f"upcoming-task-{uuid.uuid4().hex}",
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": _chat_request(prompt),
+    }
+    with _batch_lock, open(BATCH_QUEUE_FILE, "ab") as f:
+        f.write(_json_dumps(request) + b"\n")
+    start_batch_worker()
+    return True
+
+
+def latest_upcoming_task_suggestion() -> Optional[str]:
+    """Return the most recent suggestion produced by the batch worker, if any."""
+    try:
+        f = open(SUGGESTIONS_FILE, "rb")
+    except FileNotFoundError:
+        return None
+    # Called on every Streamlit rerun and the file only grows, so read it backwards in
+    # blocks and stop at the last readable line.
+    with f:
+        pos = f.seek(0, os.SEEK_END)
+        carry = b""  # start of a line cut off by the previous block
+        while pos > 0:
+            step = min(pos, SUGGESTIONS_READ_BYTES)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + carry).split(b"\n")
+            carry = lines.pop(0) if pos > 0 else b""
+            for line in reversed(lines):
+                if not line.strip():
+                    continue
+                try:
+                    return _json_loads(line)["suggestion"]
+                except Exception:
+                    continue
+    return None
+
+
+def start_batch_worker():
+    global _batch_worker
+    with _batch_lock:
+        if _batch_worker is not None and _batch_worker.is_alive():
+            return
+        _batch_worker = threading.Thread(target=_run_batch_worker, name="batch-worker", daemon=True)
+        _batch_worker.start()
+
+
+def _run_batch_worker():
+    while True:
+        try:
+            _process_batch_queue()
+        except Exception as e:
+            print(f"[batch_worker] Error: {e}")
+        time.sleep(BATCH_POLL_SECONDS)
+
+
+def _process_batch_queue():
+    # One step per wakeup: poll the batch in flight, or submit the queued requests.
+    # The in-flight batch id is kept on disk so a restart resumes polling it.
+    inflight_file = BATCH_QUEUE_FILE + ".inflight"
+    submitting_file = BATCH_QUEUE_FILE + ".submitting"
+    client = get_openai_client()
+
+    if os.path.exists(inflight_file):
+        with open(inflight_file, "r", encoding="utf-8") as f:
+            batch_id = f.read().strip()
+        batch = client.batches.retrieve(batch_id)
+        if batch.status not in ("completed", "failed", "expired", "cancelled"):
+            return
+        if batch.status == "completed" and batch.output_file_id:
+            output = client.files.content(batch.output_file_id).content
+            _store_batch_suggestions(output)
+        else:
+            print(f"[batch_worker] Batch {batch_id} ended with status {batch.status}")
+        os.remove(inflight_file)
+        return
+
+    with _batch_lock:
+        if not os.path.exists(submitting_file):
+            if not os.path.exists(BATCH_QUEUE_FILE):
+                return
+            # New requests keep going to a fresh queue file while this one is uploaded.
+            os.replace(BATCH_QUEUE_FILE, submitting_file)
+
+    with open(submitting_file, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h",
+    )
+    with open(inflight_file, "w", encoding="utf-8") as f:
+        f.write(batch.id)
+    os.remove(submitting_file)
+
+
+def _store_batch_suggestions(output: bytes):
+    records = []
+    for line in output.splitlines():
+        try:
+            result = _json_loads(line)
+            content = result["response"]["body"]["choices"][0]["message"]["content"]
+        except Exception:
+            continue
+        if content:
+            records.append(_json_dumps({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "custom_id": result.get("custom_id"),
+                "suggestion": content.strip(),
+            }))
+    if records:
+        with open(SUGGESTIONS_FILE, "ab") as f:
+            f.write(b"".join(r + b"\n" for r in records))
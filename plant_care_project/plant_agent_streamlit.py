@@ -1,14 +1,17 @@
+import hashlib
 import streamlit as st
 from datetime import datetime
-from PIL import Image
 
 
 from plant_agent_core import (
     GardeningLog,
     generate_care_plan,
+    stream_care_plan,
+    LLMStreamInterrupted,
     diagnose_disease,
     suggest_next_due,
-    generate_upcoming_task_from_logs,
+    queue_upcoming_task_suggestion,
+    latest_upcoming_task_suggestion,
 )
 
 import os
@@ -16,6 +19,7 @@ import os
 
 SAMPLES_DIR = os.path.join("assets", "disease_samples")
 PLANTS_DIR = os.path.join("assets", "plants")
+THUMB_CACHE_DIR = os.path.join("assets", ".thumb_cache")
 
 PLANT_CARE_SAMPLES = [
     {
@@ -91,10 +95,30 @@ DISEASE_SAMPLES = [
 ]
 
 THUMB_SIZE = (420, 280)  # (width, height) – tweak as you like
+SMALL_THUMB_MAX = 160  # thumbnails up to this edge length use the cheaper BOX filter
 
 def make_thumb(img_path: str, size=THUMB_SIZE):
     """Center-crop + resize to a consistent thumbnail size."""
-    img = Image.open(img_path).convert("RGB")
+    # Streamlit reruns the script on every click; the mtime makes edited images re-render.
+    return _cached_thumb(img_path, tuple(size), os.path.getmtime(img_path))
+
+
+@st.cache_data(show_spinner=False)
+def _cached_thumb(img_path: str, size, mtime: float):
+    from PIL import Image  # deferred to the first uncached thumbnail to speed up cold start
+
+    # Thumbnails are also persisted on disk, so restarts and other Streamlit workers skip
+    # the decode + resize. Editing the source changes its mtime and therefore the key.
+    key = hashlib.sha1(f"{img_path}|{mtime}|{size}".encode("utf-8")).hexdigest()
+    thumb_path = os.path.join(THUMB_CACHE_DIR, f"{key}.webp")
+    if os.path.exists(thumb_path):
+        with Image.open(thumb_path) as thumb:
+            return thumb.convert("RGB")
+
+    img = Image.open(img_path)
+    # JPEGs decode at a reduced scale (kept at 2x the target for quality); no-op for PNG
+    img.draft("RGB", (size[0] * 2, size[1] * 2))
+    img = img.convert("RGB")
     w, h = img.size
     target_w, target_h = size
     target_ratio = target_w / target_h
@@ -110,7 +134,38 @@ def make_thumb(img_path: str, size=THUMB_SIZE):
         top = (h - new_h) // 2
         img = img.crop((0, top, w, top + new_h))
 
-    return img.resize(size, Image.Resampling.LANCZOS)
+    # LANCZOS is wasted at these sizes; BOX/BILINEAR look the same and resize much faster.
+    if max(size) <= SMALL_THUMB_MAX:
+        resample = Image.Resampling.BOX
+    else:
+        resample = Image.Resampling.BILINEAR
+    # reducing_gap first shrinks large sources with a cheap integer reduce, so the
+    # final filter only touches ~2x the output size.
+    img = img.resize(size, resample, reducing_gap=2.0)
+    try:
+        os.makedirs(THUMB_CACHE_DIR, exist_ok=True)
+        img.save(thumb_path, "WEBP", quality=85, method=4)
+    except (OSError, KeyError):
+        pass  # read-only assets dir or no WebP support; the in-memory cache still applies
+    return img
+
+
+def show_care_plan(plant_name: str, light: str, watering_habit: str, issues, use_llm: bool):
+    """Render a care plan; LLM-refined plans are streamed in as they are generated."""
+    if use_llm:
+        try:
+            st.write_stream(stream_care_plan(plant_name, light, watering_habit, issues))
+        except LLMStreamInterrupted as e:
+            st.warning("The AI rewrite was interrupted, so here is the full rule-based plan instead.")
+            st.markdown(e.fallback)
+    else:
+        st.markdown(generate_care_plan(plant_name, light, watering_habit, issues))
+
+
+@st.cache_resource
+def get_log() -> GardeningLog:
+    """One log per process, shared across reruns, sessions and browser tabs."""
+    return GardeningLog()
 
 
 def main():
@@ -127,11 +182,7 @@ def main():
         st.subheader("Plant Care Advisor & Gardening Log")
         st.write("Get care advice, diagnose issues, and track your gardening tasks in one place.")
 
-    # Keep the log in session so it persists across interactions
-    if "log" not in st.session_state:
-        st.session_state.log = GardeningLog()
-
-    log: GardeningLog = st.session_state.log
+    log = get_log()
 
     # Sidebar settings
     with st.sidebar:
@@ -175,14 +226,13 @@ def main():
             st.markdown(f"### Care plan for **{plant['name']}**")
 
             with st.spinner("Generating care advice..."):
-                plan = generate_care_plan(
+                show_care_plan(
                     plant_name=plant["name"],
                     light=plant["light"],
                     watering_habit=plant["watering"],
                     issues=None,
                     use_llm=use_llm,
                 )
-                st.markdown(plan)
 
                 if st.checkbox(f"Log this care review for {plant['name']}", value=False, key="log_plant_sample"):
                     log.add_entry(
@@ -203,15 +253,14 @@ def main():
             submitted = st.form_submit_button("Generate Care Plan")
 
         if submitted:
-            plan = generate_care_plan(
+            st.markdown("### Care Plan")
+            show_care_plan(
                 plant_name=plant_name,
                 light=light,
                 watering_habit=watering,
                 issues=issues or None,
                 use_llm=use_llm,
             )
-            st.markdown("### Care Plan")
-            st.markdown(plan)
 
             if st.checkbox("Log this as a care review", value=True):
                 log.add_entry(
@@ -316,12 +365,14 @@ def main():
             else:
                 st.success("Logged.")
 
-            # Generate LLM-based upcoming task suggestion
-            if use_llm:
-                with st.spinner("Analyzing your garden activities..."):
-                    upcoming_task = generate_upcoming_task_from_logs(log, use_llm=True)
-                    if upcoming_task:
-                        st.info(f"💡 **Suggested Upcoming Task**\n\n{upcoming_task}")
+            # Queue an LLM-based upcoming task suggestion; it is answered in the background
+            if use_llm and queue_upcoming_task_suggestion(log):
+                st.caption("Analyzing your garden activities – a new task suggestion will appear here once it is ready.")
+
+        if use_llm:
+            upcoming_task = latest_upcoming_task_suggestion()
+            if upcoming_task:
+                st.info(f"💡 **Suggested Upcoming Task**\n\n{upcoming_task}")
 
         col1, col2 = st.columns(2)
 
@@ -1,15 +1,62 @@
+import atexit
+import gzip
+import heapq
+import io
+import itertools
 import json
 import os
-from dataclasses import dataclass, asdict
+import re
+import shutil
+import struct
+import sys
+import textwrap
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from operator import itemgetter
+from typing import Iterator, List, Dict, Optional, Tuple, TextIO
 
-LOG_FILE = "garden_log.json"
+try:
+    import orjson  # optional: much faster (de)serialization for the gardening log
+except ImportError:
+    orjson = None
+
+try:
+    import fcntl  # POSIX only: serializes index updates between CLI processes
+except ImportError:
+    fcntl = None
+
+LOG_FILE = "garden_log.jsonl"
+LEGACY_LOG_FILE = "garden_log.json"  # pre-JSONL log, migrated on first load
+FLUSH_THRESHOLD = 16  # buffered entries that trigger a write; also flushed on exit
+ROTATE_BYTES = 1 << 20  # live log size at which it is rotated into a gzip segment
+
+# Sidecar index: a header, then one fixed-width record per entry in file order.
+_IDX_MAGIC = b"GLOGIDX2"
+_IDX_HEADER = struct.Struct("<8sIQ")  # magic, highest rotated segment, inode of the live log
+_IDX_RECORD = struct.Struct("<32sIQI")  # next_due (ASCII, NUL-padded), segment (0 = live), offset, length
+_IDX_DUE_SIZE = 32
+_IDX_READ_RECORDS = 1 << 14  # records read per chunk when loading or rewriting the index
+
+
+# ---------- JSON Helpers ----------
+
+def _json_loads(raw: bytes):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
 
 
 # ---------- Data Models ----------
 
-@dataclass
+@dataclass(slots=True)  # no per-instance __dict__: smaller entries and faster attribute access
 class LogEntry:
     timestamp: str
     plant_name: str
@@ -20,55 +67,452 @@ class LogEntry:
 
 # ---------- Gardening Log ----------
 
+def _to_entry(record: Dict) -> LogEntry:
+    return LogEntry(
+        timestamp=record["timestamp"],
+        plant_name=record["plant_name"],
+        action=record["action"],
+        notes=record.get("notes") or "",
+        next_due=record.get("next_due"),
+    )
+
+
+def _is_valid_record(record) -> bool:
+    """Same rules as plant_agent_core._entry_from_record, since both front ends read the same file."""
+    if not isinstance(record, dict):
+        return False
+    if not all(isinstance(record.get(k), str) for k in ("timestamp", "plant_name", "action")):
+        return False
+    if not isinstance(record.get("notes"), (str, type(None))):
+        return False
+    # next_due is stored in a fixed-width ASCII index field, so it must fit there intact.
+    next_due = record.get("next_due")
+    return next_due is None or (
+        isinstance(next_due, str) and next_due.isascii() and len(next_due) <= _IDX_DUE_SIZE
+    )
+
+
+def _pack_index_record(record: Dict, segment: int, offset: int, length: int) -> bytes:
+    return _IDX_RECORD.pack((record.get("next_due") or "").encode("ascii"), segment, offset, length)
+
+
+def _rotated_segments(filepath: str) -> List[Tuple[int, str]]:
+    """(N, path) of the rotated segments <log>.N.gz, oldest first."""
+    directory = os.path.dirname(filepath) or "."
+    prefix = os.path.basename(filepath) + "."
+    numbers = set()
+    for name in os.listdir(directory):
+        if not name.startswith(prefix):
+            continue
+        suffix = name[len(prefix):]
+        if suffix.endswith(".gz"):
+            suffix = suffix[:-3]
+        if suffix.isdigit():
+            numbers.add(int(suffix))
+
+    segments = []
+    for n in sorted(numbers):
+        path = f"{filepath}.{n}"
+        # A plain <log>.N is only left behind by an interrupted rotation.
+        segments.append((n, path + ".gz" if os.path.exists(path + ".gz") else path))
+    return segments
+
+
 class GardeningLog:
+    """
+    JSON Lines gardening log with a fixed-width sidecar index (<log>.idx).
+
+    Entries stay on disk: the index records where each one lives, so recent entries
+    and upcoming tasks are read by seeking instead of loading the whole history.
+    """
+
     def __init__(self, filepath: str = LOG_FILE):
         self.filepath = filepath
-        self.entries: List[LogEntry] = []
+        self.index_path = os.path.splitext(filepath)[0] + ".idx"
+        # Entries not yet written to disk; see flush().
+        self._pending: List[Dict] = []
+        self._flush_threshold = FLUSH_THRESHOLD
+        # Min-heap of (next_due, seq, ref) for get_upcoming_tasks(), where ref is an index
+        # record number or, for an entry added in this session, the entry itself.
+        # ISO-8601 strings sort chronologically, so they are compared without parsing.
+        self._due_heap: List[Tuple[str, int, object]] = []
+        self._seq = itertools.count()  # heap tie-breaker, so refs are never compared
+        self._lock_file = None
+        self._lock_depth = 0
         self._load()
+        atexit.register(self.flush)
 
     def _load(self):
-        if os.path.exists(self.filepath):
+        with self._index_lock():
+            if (not os.path.exists(self.filepath) and not _rotated_segments(self.filepath)
+                    and os.path.exists(LEGACY_LOG_FILE) and self.filepath == LOG_FILE):
+                self._migrate_legacy()
+            if not self._read_index():
+                self._rebuild_index()
+            self._sync_index()
+
+    def _migrate_legacy(self):
+        # One-time conversion of the old single-JSON-array log file.
+        try:
+            with open(LEGACY_LOG_FILE, "rb") as f:
+                records = [r for r in _json_loads(f.read()) if _is_valid_record(r)]
+        except Exception:
+            return
+        records.sort(key=itemgetter("timestamp"))
+        # Write a sibling file and swap it in: a crash mid-write must not leave a partial
+        # log behind, since its existence stops the migration from running again.
+        tmp_path = self.filepath + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(_json_dumps(r) + b"\n" for r in records))
+        os.replace(tmp_path, self.filepath)
+
+    # ----- index -----
+
+    @contextmanager
+    def _index_lock(self):
+        """
+        Exclusive lock on <log>.idx.lock while the index is read or updated, so several
+        CLI processes (e.g. a --batch job next to an interactive session) take turns.
+        Re-entrant within one instance. Without fcntl (Windows) this is a no-op.
+        """
+        if self._lock_depth == 0 and fcntl is not None:
+            self._lock_file = open(self.index_path + ".lock", "ab")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0 and self._lock_file is not None:
+                self._lock_file.close()  # releases the lock
+                self._lock_file = None
+
+    def _reset_index_state(self, last_segment: int, live_ino: int):
+        self._count = 0            # records in the index
+        self._segment = last_segment  # highest rotated segment number covered
+        self._live_ino = live_ino  # inode of the live file the seg-0 records point into
+        self._live_end = 0         # bytes of the live file already indexed
+        self._due_heap = [(r["next_due"], next(self._seq), r) for r in self._pending if r["next_due"]]
+        heapq.heapify(self._due_heap)
+
+    def _read_index(self) -> bool:
+        """Load the due-date heap from an existing index; False if it is missing or stale."""
+        try:
+            f = open(self.index_path, "rb")
+        except OSError:
+            return False
+        with f:
+            header = f.read(_IDX_HEADER.size)
+            if len(header) < _IDX_HEADER.size:
+                return False
+            magic, last_segment, live_ino = _IDX_HEADER.unpack(header)
+            segments = _rotated_segments(self.filepath)
+            if magic != _IDX_MAGIC or last_segment != (segments[-1][0] if segments else 0):
+                return False
+
+            self._reset_index_state(last_segment, live_ino)
+            # Read in chunks, so startup never holds the whole index in memory.
+            torn = False
+            while chunk := f.read(_IDX_READ_RECORDS * _IDX_RECORD.size):
+                usable = len(chunk) - len(chunk) % _IDX_RECORD.size
+                if not self._absorb_index_records(chunk[:usable]):
+                    return False
+                torn = usable != len(chunk)
+        if torn:
+            # Drop a torn last record.
+            os.truncate(self.index_path, _IDX_HEADER.size + self._count * _IDX_RECORD.size)
+        return True
+
+    def _absorb_index_records(self, body) -> bool:
+        """
+        Add index records numbered from self._count to the in-memory state. False if they
+        do not describe the log files in order (overlapping or out-of-range records).
+        """
+        heap = self._due_heap
+        ends: Dict[int, int] = {0: self._live_end}
+        n = self._count
+        for due, segment, offset, length in _IDX_RECORD.iter_unpack(body):
+            if segment > self._segment or offset < ends.get(segment, 0):
+                return False
+            ends[segment] = offset + length
+            if due[0]:
+                heapq.heappush(heap, (due.rstrip(b"\0").decode(), next(self._seq), n))
+            n += 1
+        self._count = n
+        self._live_end = ends[0]
+        return True
+
+    def _refresh_from_index(self):
+        """Pick up index changes made by another CLI process since our last look."""
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(_IDX_HEADER.size)
+                size = os.fstat(f.fileno()).st_size
+                expected = _IDX_HEADER.size + self._count * _IDX_RECORD.size
+                unchanged = header == _IDX_HEADER.pack(_IDX_MAGIC, self._segment, self._live_ino)
+                extra = b""
+                if unchanged and size - expected >= _IDX_RECORD.size:
+                    f.seek(expected)
+                    extra = f.read((size - expected) // _IDX_RECORD.size * _IDX_RECORD.size)
+        except OSError:
+            self._rebuild_index()
+            return
+        if unchanged and size >= expected:
+            # Records appended by another process; they continue our numbering.
+            if extra and not self._absorb_index_records(extra):
+                self._rebuild_index()
+        elif not self._read_index():
+            # Rewritten elsewhere (rotation, rebuild, new live file): reload it.
+            self._rebuild_index()
+
+    def _catch_up(self):
+        """Bring the in-memory index up to date with the index file and the log files."""
+        self._refresh_from_index()
+        self._sync_index()
+
+    def _write_index_header(self):
+        with open(self.index_path, "r+b") as f:
+            f.write(_IDX_HEADER.pack(_IDX_MAGIC, self._segment, self._live_ino))
+
+    def _append_index(self, records: List[bytes]):
+        if records:
+            with open(self.index_path, "ab") as f:
+                f.write(b"".join(records))
+            self._count += len(records)
+
+    def _rebuild_index(self):
+        segments = _rotated_segments(self.filepath)
+        self._reset_index_state(segments[-1][0] if segments else 0, 0)
+        with open(self.index_path, "wb") as f:
+            f.write(_IDX_HEADER.pack(_IDX_MAGIC, self._segment, 0))
+        for n, path in segments:
+            opener = gzip.open if path.endswith(".gz") else open
             try:
-                with open(self.filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.entries = [LogEntry(**e) for e in data]
+                with opener(path, "rb") as f:
+                    self._index_lines(f, n, 0)
+            except (OSError, EOFError) as e:
+                # A damaged gzip segment keeps whatever was read before the damage.
+                print(f"[GardeningLog] Could not fully read {path}: {e}", file=sys.stderr)
+        self._sync_index()
+
+    def _index_lines(self, f, segment: int, offset: int):
+        """Index the complete lines of f, which is positioned at byte offset."""
+        records = []
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # still being written by another process; indexed on a later sync
+            start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+            try:
+                record = _json_loads(line)
             except Exception:
-                self.entries = []
-        else:
-            self.entries = []
-
-    def _save(self):
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump([asdict(e) for e in self.entries], f, indent=2)
+                continue  # a torn or hand-edited line only loses itself
+            if not _is_valid_record(record):
+                continue
+            if record.get("next_due"):
+                heapq.heappush(self._due_heap, (record["next_due"], next(self._seq), self._count + len(records)))
+            records.append(_pack_index_record(record, segment, start, len(line)))
+        self._append_index(records)
+        if segment == 0:
+            self._live_end = offset
+
+    def _sync_index(self):
+        """Catch the index up with the log files, e.g. after the Streamlit app appended to them."""
+        segments = _rotated_segments(self.filepath)
+        if (segments[-1][0] if segments else 0) != self._segment:
+            self._rebuild_index()  # rotated by another process
+            return
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            if self._live_end:
+                self._rebuild_index()  # live file was deleted; drop its records
+            return
+        if st.st_ino != self._live_ino:
+            if self._live_end:
+                self._rebuild_index()  # live file was rewritten, e.g. compacted by the Streamlit app
+                return
+            self._live_ino = st.st_ino
+            self._write_index_header()
+        elif st.st_size < self._live_end:
+            self._rebuild_index()
+            return
+        if st.st_size > self._live_end:
+            with open(self.filepath, "rb") as f:
+                f.seek(self._live_end)
+                self._index_lines(f, 0, self._live_end)
+
+    def _segment_path(self, segment: int) -> str:
+        if segment == 0:
+            return self.filepath
+        path = f"{self.filepath}.{segment}"
+        return path + ".gz" if os.path.exists(path + ".gz") else path
+
+    def _read_records(self, numbers: List[int]) -> List[Dict]:
+        """Read the entries behind the given index records, one seek each."""
+        if not numbers:
+            return []
+        locations = []
+        with open(self.index_path, "rb") as idx:
+            for n in numbers:
+                idx.seek(_IDX_HEADER.size + n * _IDX_RECORD.size)
+                _, segment, offset, length = _IDX_RECORD.unpack(idx.read(_IDX_RECORD.size))
+                locations.append((segment, offset, length))
+
+        records = {}
+        for segment in {loc[0] for loc in locations}:
+            path = self._segment_path(segment)
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rb") as f:
+                # Ascending offsets, so a gzip segment is decompressed at most once.
+                for loc in sorted(loc for loc in locations if loc[0] == segment):
+                    f.seek(loc[1])
+                    records[loc] = _json_loads(f.read(loc[2]))
+        return [records[loc] for loc in locations]
+
+    # ----- public API -----
 
     def add_entry(self, plant_name: str, action: str, notes: str, next_due: Optional[datetime] = None):
-        entry = LogEntry(
-            timestamp=datetime.now().isoformat(timespec="seconds"),
-            plant_name=plant_name,
-            action=action,
-            notes=notes,
-            next_due=next_due.isoformat(timespec="seconds") if next_due else None,
-        )
-        self.entries.append(entry)
-        self._save()
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            # Names and actions repeat across many entries; interning shares one copy of each.
+            "plant_name": sys.intern(plant_name),
+            "action": sys.intern(action),
+            "notes": notes,
+            "next_due": next_due.isoformat(timespec="seconds") if next_due else None,
+        }
+        if record["next_due"]:
+            heapq.heappush(self._due_heap, (record["next_due"], next(self._seq), record))
+        self._pending.append(record)
+        if len(self._pending) >= self._flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """Append all buffered entries to the log file in a single write."""
+        if not self._pending:
+            return
+        with self._index_lock():
+            self._flush_locked()
+
+    def _flush_locked(self):
+        # Index whatever others appended first, so index records stay in file order.
+        self._catch_up()
+        lines = [_json_dumps(r) + b"\n" for r in self._pending]
+        with open(self.filepath, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(b"".join(lines))
+            size = f.tell()
+            ino = os.fstat(f.fileno()).st_ino
+        if self._live_end and (ino != self._live_ino or offset < self._live_end):
+            # Replaced since the sync above: reindex everything, these lines included.
+            self._pending.clear()
+            self._rebuild_index()
+            if size >= ROTATE_BYTES:
+                self.rotate()
+            return
+        if not self._live_end:
+            self._live_ino = ino
+            self._write_index_header()
+        if offset > self._live_end:
+            # Lines another process appended between the sync above and this write.
+            with open(self.filepath, "rb") as f:
+                f.seek(self._live_end)
+                self._index_lines(io.BytesIO(f.read(offset - self._live_end)), 0, self._live_end)
+
+        records = []
+        for record, line in zip(self._pending, lines):
+            records.append(_pack_index_record(record, 0, offset, len(line)))
+            offset += len(line)
+        # The heap already holds these entries (as dicts), so they are not pushed again.
+        self._append_index(records)
+        self._live_end = offset
+        self._pending.clear()
+        if size >= ROTATE_BYTES:
+            self.rotate()
+
+    def rotate(self):
+        """Move the live log into the next gzip segment (<log>.N.gz) and start a fresh file."""
+        with self._index_lock():
+            if os.path.exists(self.filepath):
+                self._rotate_locked()
+
+    def _rotate_locked(self):
+        self._catch_up()
+        n = self._segment + 1
+        base = f"{self.filepath}.{n}"
+        # Renaming first means a crash at any point leaves each entry in exactly one file.
+        os.replace(self.filepath, base)
+        with open(base, "rb") as f:
+            f.seek(self._live_end)
+            self._index_lines(f, 0, self._live_end)  # lines appended since the last sync
+        with open(base, "rb") as src, gzip.open(base + ".gz.tmp", "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(base + ".gz.tmp", base + ".gz")
+        os.remove(base)
+
+        # Offsets are unchanged by the move, so the index only needs the live-file
+        # records relabelled with the new segment number.
+        tmp_path = self.index_path + ".tmp"
+        remaining = self._count
+        with open(self.index_path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.seek(_IDX_HEADER.size)
+            dst.write(_IDX_HEADER.pack(_IDX_MAGIC, n, 0))
+            while remaining:
+                batch = min(remaining, _IDX_READ_RECORDS)
+                dst.write(b"".join(
+                    _IDX_RECORD.pack(due, n if segment == 0 else segment, offset, length)
+                    for due, segment, offset, length in _IDX_RECORD.iter_unpack(src.read(batch * _IDX_RECORD.size))
+                ))
+                remaining -= batch
+        os.replace(tmp_path, self.index_path)
+        self._segment, self._live_ino, self._live_end = n, 0, 0
+
+    def iter_entries(self) -> Iterator[LogEntry]:
+        """Every entry, oldest first, streamed from all log segments (for exports)."""
+        self.flush()
+        paths = [path for _, path in _rotated_segments(self.filepath)]
+        if os.path.exists(self.filepath):
+            paths.append(self.filepath)
+        for path in paths:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = _json_loads(line)
+                    except Exception:
+                        continue
+                    if _is_valid_record(record):
+                        yield _to_entry(record)
 
     def get_recent_entries(self, limit: int = 10) -> List[LogEntry]:
-        return sorted(self.entries, key=lambda e: e.timestamp, reverse=True)[:limit]
-
-    def get_upcoming_tasks(self) -> List[LogEntry]:
-        now = datetime.now()
-        upcoming = []
-        for e in self.entries:
-            if not e.next_due:
-                continue
-            try:
-                due = datetime.fromisoformat(e.next_due)
-                if due >= now:
-                    upcoming.append(e)
-            except Exception:
-                continue
-        upcoming.sort(key=lambda e: e.next_due)
-        return upcoming
+        if limit <= 0:
+            return []
+        with self._index_lock():
+            self._catch_up()
+            # Entries are appended in time order, so the most recent ones are the tail of
+            # the index followed by anything still buffered.
+            pending = self._pending[-limit:]
+            on_disk = min(limit - len(pending), self._count)
+            records = self._read_records(range(self._count - on_disk, self._count)) + pending
+        return [_to_entry(r) for r in reversed(records)]
+
+    def get_upcoming_tasks(self, limit: int = 20) -> List[LogEntry]:
+        if limit <= 0:
+            return []
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._index_lock():
+            self._catch_up()
+            heap = self._due_heap
+            # Due dates only ever fall into the past, so expired tasks are dropped for good.
+            while heap and heap[0][0] < now:
+                heapq.heappop(heap)
+            # Only the `limit` soonest tasks are selected, and only their entries are read.
+            due = heapq.nsmallest(limit, heap)
+            loaded = iter(self._read_records([ref for _, _, ref in due if isinstance(ref, int)]))
+        return [_to_entry(ref if isinstance(ref, dict) else next(loaded)) for _, _, ref in due]
 
 
 # ---------- Plant Knowledge Base (Simple Rules) ----------
@@ -101,56 +545,100 @@ PLANT_DATABASE: Dict[str, Dict] = {
 }
 
 
+# Characters ignored when matching plant names, so "Snake Plant", "snakeplant" and
+# "snake-plant" all find the same entry.
+_NAME_TRANS = str.maketrans("", "", " \t\r\n-")
+
+
 def normalize_plant_name(name: str) -> str:
-    return name.strip().lower()
+    return name.translate(_NAME_TRANS).casefold()
+
+
+# PLANT_DATABASE keyed by normalized name, computed once at import.
+_PLANT_DB_NORM: Dict[str, Dict] = {normalize_plant_name(k): v for k, v in PLANT_DATABASE.items()}
 
 
 # ---------- Disease / Issue Diagnosis (Rule-based) ----------
 
-def diagnose_disease(symptoms: str) -> Dict[str, str]:
-    text = symptoms.lower()
+# Possible causes as (cause, advice line), so a diagnosis only joins prebuilt strings.
+_NUTRIENT = ("Nutrient deficiency or overwatering",
+             "- Nutrient deficiency or overwatering: Check drainage, avoid waterlogging, and consider a balanced "
+             "fertilizer. Ensure pot has drainage holes.")
+_LOW_HUMIDITY = ("Low humidity or underwatering",
+                 "- Low humidity or underwatering: Increase humidity (tray of water, humidifier) and check that you "
+                 "are watering evenly.")
+_LEAF_SPOT = ("Fungal or bacterial leaf spot",
+              "- Fungal or bacterial leaf spot: Remove heavily affected leaves, improve air circulation, avoid "
+              "overhead watering. Consider a fungicide if severe.")
+_POWDERY_MILDEW = ("Powdery mildew",
+                   "- Powdery mildew: Remove affected leaves, increase airflow, avoid wetting foliage. Use a safe "
+                   "fungicidal spray if needed.")
+_ROT = ("Root or stem rot (usually overwatering)",
+        "- Root or stem rot (usually overwatering): Reduce watering, improve drainage, trim rotten roots/stems if "
+        "possible, and repot into fresh dry soil.")
+_PESTS = ("Pest infestation",
+          "- Pest infestation: Isolate the plant, wash leaves with water, and treat with insecticidal soap or neem "
+          "oil. Repeat weekly until resolved.")
+
+# (keywords that must all appear, (cause, advice line)), in reporting order. A cause with
+# alternative triggers ("black" or "brown" spots) has one row per alternative.
+_DIAGNOSIS_RULES: List[Tuple[frozenset, Tuple[str, str]]] = [
+    (frozenset({"yellow", "leaf"}), _NUTRIENT),
+    (frozenset({"brown", "tip"}), _LOW_HUMIDITY),
+    (frozenset({"spots", "black"}), _LEAF_SPOT),
+    (frozenset({"spots", "brown"}), _LEAF_SPOT),
+    (frozenset({"white", "powder"}), _POWDERY_MILDEW),
+    *[(frozenset({k}), _ROT) for k in ("soft", "mushy", "rot")],
+    *[(frozenset({k}), _PESTS) for k in ("bugs", "insect", "aphid", "mealy", "mites")],
+]
+
+
+# Lead keyword -> ids of the rules that need it. A rule can only match when its lead
+# keyword was found, so only those rules are checked in full.
+_DIAG_INDEX: Dict[str, List[int]] = {}
+for _rule_id, (_keywords, _) in enumerate(_DIAGNOSIS_RULES):
+    _DIAG_INDEX.setdefault(min(_keywords), []).append(_rule_id)
+
+
+def _keyword_regex(keywords) -> re.Pattern:
+    """
+    One regex alternation over `keywords`, matched in a single scan. The zero-width lookahead
+    lets matches overlap, so plain substring semantics are kept ("insects" still finds "insect").
+    """
+    return re.compile("(?=(" + "|".join(map(re.escape, sorted(keywords))) + "))")
+
+
+_SYMPTOM_RE = _keyword_regex({k for keywords, _ in _DIAGNOSIS_RULES for k in keywords})
+
+
+_NO_MATCH = (
+    "No clear match from the symptom rules.",
+    "Check for pests under leaves, inspect roots for rot, and review watering and light conditions. If possible, compare visuals to trusted plant diagnosis resources."
+)
+
+
+@lru_cache(maxsize=512)
+def _diagnose_cached(symptoms: str) -> Tuple[str, str]:
+    """(summary, advice) for lowercased symptom text."""
+    hits = set(_SYMPTOM_RE.findall(symptoms))
+    candidates = {rule_id for keyword in hits for rule_id in _DIAG_INDEX.get(keyword, ())}
     possible = []
-
-    if "yellow" in text and "leaf" in text:
-        possible.append(
-            ("Nutrient deficiency or overwatering",
-             "Check drainage, avoid waterlogging, and consider a balanced fertilizer. Ensure pot has drainage holes.")
-        )
-    if "brown" in text and "tip" in text:
-        possible.append(
-            ("Low humidity or underwatering",
-             "Increase humidity (tray of water, humidifier) and check that you are watering evenly.")
-        )
-    if "spots" in text and ("black" in text or "brown" in text):
-        possible.append(
-            ("Fungal or bacterial leaf spot",
-             "Remove heavily affected leaves, improve air circulation, avoid overhead watering. Consider a fungicide if severe.")
-        )
-    if "white" in text and ("powder" in text or "powdery" in text):
-        possible.append(
-            ("Powdery mildew",
-             "Remove affected leaves, increase airflow, avoid wetting foliage. Use a safe fungicidal spray if needed.")
-        )
-    if "soft" in text or "mushy" in text or "rot" in text:
-        possible.append(
-            ("Root or stem rot (usually overwatering)",
-             "Reduce watering, improve drainage, trim rotten roots/stems if possible, and repot into fresh dry soil.")
-        )
-    if "bugs" in text or "insect" in text or "aphid" in text or "mealy" in text or "mites" in text:
-        possible.append(
-            ("Pest infestation",
-             "Isolate the plant, wash leaves with water, and treat with insecticidal soap or neem oil. Repeat weekly until resolved.")
-        )
+    for rule_id in sorted(candidates):
+        keywords, cause = _DIAGNOSIS_RULES[rule_id]
+        if keywords <= hits and cause not in possible:
+            possible.append(cause)
 
     if not possible:
-        return {
-            "summary": "No clear match from the symptom rules.",
-            "advice": "Check for pests under leaves, inspect roots for rot, and review watering and light conditions. If possible, compare visuals to trusted plant diagnosis resources."
-        }
+        return _NO_MATCH
 
     summary = "; ".join([p[0] for p in possible])
-    advice = "\n\n".join([f"- {p[0]}: {p[1]}" for p in possible])
+    advice = "\n\n".join([p[1] for p in possible])
+    return summary, advice
+
 
+def diagnose_disease(symptoms: str) -> Dict[str, str]:
+    # A fresh dict per call, so callers may modify it without touching the cache.
+    summary, advice = _diagnose_cached(symptoms.lower())
     return {
         "summary": summary,
         "advice": advice,
@@ -159,60 +647,100 @@ def diagnose_disease(symptoms: str) -> Dict[str, str]:
 
 # ---------- Plant Care Advisor Logic ----------
 
+_PROFILE_BLOCKS: Dict[str, str] = {
+    key: (
+        "Basic profile (from built-in database):\n"
+        f"- Watering: {base['water']}\n"
+        f"- Light: {base['light']}\n"
+        f"- Soil: {base['soil']}\n"
+        f"- Fertilizer: {base['fertilizer']}"
+    )
+    for key, base in _PLANT_DB_NORM.items()
+}
+
+_GENERAL_GUIDE_BLOCK = (
+    "I don't have this plant in the small built-in database, so here are general indoor plant guidelines:\n"
+    "- Water when the top 2–3 cm (1 inch) of soil feels dry, unless it is a cactus/succulent.\n"
+    "- Provide bright, indirect light if possible.\n"
+    "- Use well-draining potting mix and ensure the pot has drainage holes.\n"
+    "- Fertilize lightly during the active growing season (spring/summer)."
+)
+
+_BEST_PRACTICES_BLOCK = (
+    "General best practices:\n"
+    "- Check soil moisture with your finger before watering.\n"
+    "- Rotate the plant every 1–2 weeks for even growth.\n"
+    "- Remove dead or yellowing leaves to reduce stress and disease risk."
+)
+
+_CARE_PLAN_TEMPLATE = (
+    "Plant care plan for **{plant_name}**\n"
+    "\n{profile_block}\n"
+    "\nYour described conditions:\n"
+    "- Light: {light}\n"
+    "- Watering habit: {watering_habit}"
+    "{issues_block}\n"
+    "\n{best_practices_block}"
+)
+
+_ISSUES_TEMPLATE = (
+    "\n- Reported issues: {issues}\n"
+    "\nPreliminary issue diagnosis:\n"
+    "Possible causes: {summary}\n"
+    "Suggested actions:\n"
+    "{advice}"
+)
+
+
 def generate_care_plan(plant_name: str,
                        light: str,
                        watering_habit: str,
                        issues: Optional[str] = None) -> str:
-    key = normalize_plant_name(plant_name)
-    base = PLANT_DATABASE.get(key)
-
-    lines = [f"Plant care plan for **{plant_name}**"]
-
-    if base:
-        lines.append("\nBasic profile (from built-in database):")
-        lines.append(f"- Watering: {base['water']}")
-        lines.append(f"- Light: {base['light']}")
-        lines.append(f"- Soil: {base['soil']}")
-        lines.append(f"- Fertilizer: {base['fertilizer']}")
-    else:
-        lines.append("\nI don't have this plant in the small built-in database, so here are general indoor plant guidelines:")
-        lines.append("- Water when the top 2–3 cm (1 inch) of soil feels dry, unless it is a cactus/succulent.")
-        lines.append("- Provide bright, indirect light if possible.")
-        lines.append("- Use well-draining potting mix and ensure the pot has drainage holes.")
-        lines.append("- Fertilize lightly during the active growing season (spring/summer).")
-
-    lines.append("\nYour described conditions:")
-    lines.append(f"- Light: {light}")
-    lines.append(f"- Watering habit: {watering_habit}")
+    # Blank issues read the same as none, so both share one cache entry.
+    return _generate_care_plan_cached(plant_name, light, watering_habit, issues or None)
 
-    if issues:
-        lines.append(f"- Reported issues: {issues}")
-        diag = diagnose_disease(issues)
-        lines.append("\nPreliminary issue diagnosis:")
-        lines.append(f"Possible causes: {diag['summary']}")
-        lines.append("Suggested actions:")
-        lines.append(diag["advice"])
 
-    lines.append("\nGeneral best practices:")
-    lines.append("- Check soil moisture with your finger before watering.")
-    lines.append("- Rotate the plant every 1–2 weeks for even growth.")
-    lines.append("- Remove dead or yellowing leaves to reduce stress and disease risk.")
+@lru_cache(maxsize=256)
+def _generate_care_plan_cached(plant_name: str,
+                               light: str,
+                               watering_habit: str,
+                               issues: Optional[str]) -> str:
+    profile_block = _PROFILE_BLOCKS.get(normalize_plant_name(plant_name), _GENERAL_GUIDE_BLOCK)
 
-    return "\n".join(lines)
+    issues_block = ""
+    if issues:
+        issues_block = _ISSUES_TEMPLATE.format(issues=issues, **diagnose_disease(issues))
+
+    return _CARE_PLAN_TEMPLATE.format(
+        plant_name=plant_name,
+        profile_block=profile_block,
+        light=light,
+        watering_habit=watering_habit,
+        issues_block=issues_block,
+        best_practices_block=_BEST_PRACTICES_BLOCK,
+    )
 
 
 # ---------- Helper: Suggested Next-Due Logic ----------
 
+# Action stem -> time until the next reminder. Earlier stems win when several match.
+_ACTION_DELTAS: Dict[str, timedelta] = {
+    "water": timedelta(days=3),
+    "fertiliz": timedelta(weeks=4),
+    "prune": timedelta(weeks=8),
+    "trim": timedelta(weeks=8),
+    "repot": timedelta(days=180),
+}
+_ACTION_RE = _keyword_regex(_ACTION_DELTAS)
+
+
 def suggest_next_due(action: str) -> Optional[datetime]:
-    action = action.lower()
-    if "water" in action:
-        return datetime.now() + timedelta(days=3)
-    if "fertiliz" in action:
-        return datetime.now() + timedelta(weeks=4)
-    if "prune" in action or "trim" in action:
-        return datetime.now() + timedelta(weeks=8)
-    if "repot" in action:
-        return datetime.now() + timedelta(days=180)
+    hits = set(_ACTION_RE.findall(action.lower()))
+    if not hits:
+        return None
+    for stem, delta in _ACTION_DELTAS.items():
+        if stem in hits:
+            return datetime.now() + delta
     return None
 
 
@@ -297,8 +825,64 @@ def handle_upcoming_tasks(log: GardeningLog):
         print(f"- {e.next_due} | {e.plant_name} | {e.action} | {e.notes or 'no notes'}")
 
 
+def handle_care_advice_batch(log: GardeningLog, record: Dict) -> Dict:
+    """Care plan for one batch request: {"plant", "light", "watering", "issues"?, "log"?}."""
+    plant = str(record.get("plant") or "").strip()
+    light = str(record.get("light") or "").strip()
+    watering = str(record.get("watering") or "").strip()
+    issues = str(record.get("issues") or "").strip() or None
+
+    result = {"plant": plant, "care_plan": generate_care_plan(plant, light, watering, issues)}
+    if record.get("log"):
+        log.add_entry(plant_name=plant, action="care review", notes=f"Conditions: light={light}, watering={watering}")
+        result["logged"] = True
+    return result
+
+
+def run_batch(log: GardeningLog):
+    """
+    Non-interactive mode for scripts: one JSON request per stdin line, one JSON result
+    per stdout line, in the same order.
+    """
+    out = sys.stdout.buffer
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            record = _json_loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+            result = handle_care_advice_batch(log, record)
+        except Exception as e:
+            result = {"error": str(e)}
+        out.write(_json_dumps(result) + b"\n")
+    out.flush()
+
+
+def dump_pretty(log: GardeningLog, out: Optional[TextIO] = None):
+    """
+    Write the whole log as an indented JSON array for reading or diffing by hand.
+    The log itself stays compact JSON Lines; this only formats on demand.
+    """
+    out = out or sys.stdout
+    out.write("[")
+    sep = "\n"
+    for entry in log.iter_entries():
+        out.write(sep + textwrap.indent(json.dumps(asdict(entry), indent=2, ensure_ascii=False), "  "))
+        sep = ",\n"
+    out.write("\n]\n" if sep != "\n" else "]\n")
+
+
 def main():
     log = GardeningLog()
+    if "--batch" in sys.argv[1:]:
+        run_batch(log)
+        log.flush()
+        return
+    if "--pretty" in sys.argv[1:]:
+        dump_pretty(log)
+        return
+
     while True:
         print_menu()
         choice = input("Choose an option: ").strip()
@@ -313,6 +897,7 @@ def main():
         elif choice == "5":
             handle_upcoming_tasks(log)
         elif choice == "0":
+            log.flush()
             print("Goodbye and happy gardening!")
             break
         else:
@@ -0,0 +1,256 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plant_care_agent  # noqa: E402
+from plant_care_agent import GardeningLog  # noqa: E402
+
+
+def _due(days: int) -> datetime:
+    return datetime.now() + timedelta(days=days)
+
+
+class GardeningLogIndexTest(unittest.TestCase):
+    """CLI GardeningLog and its garden_log.idx sidecar index."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._rotate_bytes = plant_care_agent.ROTATE_BYTES
+
+    def tearDown(self):
+        plant_care_agent.ROTATE_BYTES = self._rotate_bytes
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def names(self, entries):
+        return [e.plant_name for e in entries]
+
+    def test_reopen_reads_entries_through_index(self):
+        log = GardeningLog()
+        log.add_entry("basil", "water", "", _due(2))
+        log.add_entry("rose", "prune", "")
+        log.add_entry("fern", "water", "", _due(1))
+        log.flush()
+
+        reopened = GardeningLog()
+        self.assertEqual(self.names(reopened.get_recent_entries()), ["fern", "rose", "basil"])
+        self.assertEqual(self.names(reopened.get_upcoming_tasks()), ["fern", "basil"])
+        self.assertTrue(os.path.exists("garden_log.idx"))
+
+    def test_unflushed_entries_are_visible(self):
+        log = GardeningLog()
+        log.add_entry("basil", "water", "", _due(1))
+        log.flush()
+        log.add_entry("rose", "water", "", _due(2))
+        self.assertEqual(self.names(log.get_recent_entries()), ["rose", "basil"])
+        self.assertEqual(self.names(log.get_upcoming_tasks()), ["basil", "rose"])
+        log.flush()  # not left for the atexit flush, which runs outside the temp dir
+
+    def test_rotation_keeps_full_history(self):
+        plant_care_agent.ROTATE_BYTES = 1000
+        log = GardeningLog()
+        for i in range(40):
+            log.add_entry(f"p{i}", "water", "x" * 20, _due(i + 1))
+        log.flush()
+
+        self.assertTrue(os.path.exists("garden_log.jsonl.1.gz"))
+        with gzip.open("garden_log.jsonl.1.gz", "rb") as f:
+            self.assertIn(b'"p0"', f.readline())
+
+        for reader in (log, GardeningLog()):
+            self.assertEqual(self.names(reader.get_recent_entries(3)), ["p39", "p38", "p37"])
+            self.assertEqual(self.names(reader.get_upcoming_tasks(2)), ["p0", "p1"])
+            self.assertEqual(len(list(reader.iter_entries())), 40)
+
+    def test_deleted_live_file_reads_as_empty(self):
+        log = GardeningLog()
+        log.add_entry("basil", "water", "", _due(1))
+        log.flush()
+        os.remove("garden_log.jsonl")
+
+        self.assertEqual(log.get_recent_entries(), [])
+        self.assertEqual(log.get_upcoming_tasks(), [])
+        self.assertEqual(GardeningLog().get_recent_entries(), [])
+
+    def test_lines_appended_by_another_writer(self):
+        log = GardeningLog()
+        log.add_entry("basil", "water", "", _due(2))
+        log.flush()
+        # The Streamlit app appends to the same file without touching the index.
+        with open("garden_log.jsonl", "ab") as f:
+            f.write(b'{"timestamp":"2026-01-01T00:00:00","plant_name":"core","action":"feed",'
+                    b'"notes":"","next_due":"9999-01-01T00:00:00"}\n')
+
+        self.assertEqual(self.names(log.get_recent_entries()), ["core", "basil"])
+        self.assertEqual(self.names(log.get_upcoming_tasks()), ["basil", "core"])
+
+    def test_two_cli_processes_share_the_index(self):
+        a = GardeningLog()
+        b = GardeningLog()
+        a.add_entry("A1", "water", "", _due(1))
+        a.flush()
+        b.add_entry("B1", "water", "", _due(2))
+        b.flush()
+        a.add_entry("A2", "water", "", _due(3))
+        a.flush()
+
+        for reader in (a, b, GardeningLog()):
+            self.assertEqual(self.names(reader.get_recent_entries()), ["A2", "B1", "A1"])
+            self.assertEqual(self.names(reader.get_upcoming_tasks()), ["A1", "B1", "A2"])
+        record_size = plant_care_agent._IDX_RECORD.size
+        header_size = plant_care_agent._IDX_HEADER.size
+        self.assertEqual(os.path.getsize("garden_log.idx"), header_size + 3 * record_size)
+
+    def test_inconsistent_index_is_rebuilt(self):
+        log = GardeningLog()
+        log.add_entry("basil", "water", "", _due(1))
+        log.flush()
+        with open("garden_log.idx", "rb") as f:
+            data = f.read()
+        record = data[plant_care_agent._IDX_HEADER.size:]
+        with open("garden_log.idx", "ab") as f:
+            f.write(record)  # the same entry indexed twice
+
+        self.assertEqual(self.names(GardeningLog().get_recent_entries()), ["basil"])
+
+    def test_malformed_lines_are_skipped(self):
+        with open("garden_log.jsonl", "wb") as f:
+            f.write(b'{"timestamp": 123, "plant_name": "z", "action": "a"}\n')
+            f.write(b'{"timestamp": "2026-01-01T00:00:00", "plant_name": "z", "action": "a", "next_due": 5}\n')
+            f.write(b'not json\n')
+            f.write(b'{"timestamp": "2026-01-01T00:00:00", "plant_name": "z", "action": "a", "notes": 7}\n')
+            f.write(b'{"timestamp": "2026-01-01T00:00:00", "plant_name": "ok", "action": "a"}\n')
+
+        log = GardeningLog()
+        self.assertEqual(self.names(log.get_recent_entries()), ["ok"])
+        self.assertEqual(log.get_upcoming_tasks(), [])
+
+
+    def test_next_due_that_does_not_fit_the_index_is_skipped(self):
+        with open("garden_log.jsonl", "wb") as f:
+            f.write(b'{"timestamp": "2026-01-01T00:00:00", "plant_name": "long", "action": "a", '
+                    b'"next_due": "9999-01-01T00:00:00.000000+00:00 extra"}\n')
+            f.write('{"timestamp": "2026-01-01T00:00:00", "plant_name": "wide", "action": "a", '
+                    '"next_due": "9999-01-01T00:00:00\u00e9"}\n'.encode())
+            f.write(b'{"timestamp": "2026-01-01T00:00:00", "plant_name": "ok", "action": "a", '
+                    b'"next_due": "9999-01-01T00:00:00"}\n')
+
+        self.assertEqual(self.names(GardeningLog().get_upcoming_tasks()), ["ok"])
+
+    def test_index_is_read_in_chunks_and_torn_records_dropped(self):
+        log = GardeningLog()
+        for i in range(7):
+            log.add_entry(f"p{i}", "water", "", _due(i + 1))
+        log.flush()
+        with open("garden_log.idx", "ab") as f:
+            f.write(b"torn")
+
+        chunk = plant_care_agent._IDX_READ_RECORDS
+        plant_care_agent._IDX_READ_RECORDS = 2
+        try:
+            reopened = GardeningLog()
+        finally:
+            plant_care_agent._IDX_READ_RECORDS = chunk
+        self.assertEqual(self.names(reopened.get_upcoming_tasks(3)), ["p0", "p1", "p2"])
+        self.assertEqual(
+            os.path.getsize("garden_log.idx"),
+            plant_care_agent._IDX_HEADER.size + 7 * plant_care_agent._IDX_RECORD.size,
+        )
+
+
+class SharedLogFormatTest(unittest.TestCase):
+    """The CLI and the Streamlit core must accept exactly the same log lines."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def test_both_loaders_agree(self):
+        import plant_agent_core
+
+        with open("garden_log.jsonl", "wb") as f:
+            f.write(b'{"timestamp": 5, "plant_name": "bad", "action": "a"}\n')
+            f.write(b'{"timestamp": "2026-01-01T00:00:00", "plant_name": "no notes", "action": "a", '
+                    b'"next_due": "9999-01-01T00:00:00"}\n')
+            f.write(b'{"timestamp": "2026-01-02T00:00:00", "plant_name": "extra key", "action": "a", '
+                    b'"notes": "", "mood": "happy"}\n')
+            f.write(b'{"timestamp": "2026-01-03T00:00:00", "plant_name": "bad due", "action": "a", "next_due": 7}\n')
+
+        cli = GardeningLog()
+        core = plant_agent_core.GardeningLog()
+        self.assertEqual(
+            sorted(e.plant_name for e in cli.get_recent_entries()),
+            sorted(e.plant_name for e in core.entries),
+        )
+        self.assertEqual(sorted(e.plant_name for e in core.entries), ["extra key", "no notes"])
+        self.assertEqual([e.plant_name for e in core.get_upcoming_tasks()], ["no notes"])
+
+
+    def test_core_log_sees_cli_writes(self):
+        import plant_agent_core
+
+        core = plant_agent_core.GardeningLog()
+        core.add_entry("core1", "water", "", _due(1))
+        core.flush()
+
+        cli = GardeningLog()
+        cli.add_entry("cli1", "water", "", _due(2))
+        cli.flush()
+        self.assertEqual([e.plant_name for e in core.get_recent_entries()], ["cli1", "core1"])
+        self.assertEqual([e.plant_name for e in core.get_upcoming_tasks()], ["core1", "cli1"])
+
+        # A CLI line landing before the core's next flush is loaded once, not lost or repeated.
+        core.add_entry("core2", "water", "", _due(3))
+        cli.add_entry("cli2", "water", "", _due(4))
+        cli.flush()
+        core.flush()
+        self.assertEqual(
+            sorted(e.plant_name for e in core.get_recent_entries()), ["cli1", "cli2", "core1", "core2"]
+        )
+        self.assertEqual(
+            sorted(e.plant_name for e in plant_agent_core.GardeningLog().get_recent_entries()),
+            ["cli1", "cli2", "core1", "core2"],
+        )
+
+    def test_core_log_reloads_after_cli_rotation(self):
+        import plant_agent_core
+
+        core = plant_agent_core.GardeningLog()
+        core.add_entry("core1", "water", "", _due(1))
+        core.flush()
+        core.add_entry("unflushed", "water", "", _due(5))
+
+        cli = GardeningLog()
+        cli.add_entry("cli1", "water", "", _due(2))
+        cli.flush()
+        cli.rotate()
+        self.assertFalse(os.path.exists("garden_log.jsonl"))
+        self.assertEqual(
+            [e.plant_name for e in core.get_upcoming_tasks()], ["core1", "cli1", "unflushed"]
+        )
+
+        cli.add_entry("cli2", "water", "", _due(3))
+        cli.flush()
+        self.assertEqual(
+            [e.plant_name for e in core.get_recent_entries()], ["unflushed", "cli2", "cli1", "core1"]
+        )
+        core.flush()
+        self.assertEqual(
+            [e.plant_name for e in GardeningLog().get_recent_entries()], ["unflushed", "cli2", "cli1", "core1"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()